@@ -2,23 +2,50 @@
 
 Endpoints
 - GET  /health        -> service status
-- POST /analyze       -> accepts multipart image (field: `image`) or JSON {"use_sample": true}
+- POST /analyze       -> accepts multipart image (field: `image`) or JSON {"use_sample": true};
+                         replies with msgpack instead of JSON when `Accept: application/msgpack`;
+                         `?annotate=false` skips drawing/encoding the annotated image
 
 Design notes
 - Vision and reasoning are modular: replace the mock detector with a YOLO/OpenCV implementation by implementing Detector.load_model() and Detector.detect().
-- Returns JSON with detections, SOP mappings, recommendations and a base64 annotated image for quick demos.
+- Returns JSON with detections, SOP mappings, recommendations and a base64 (JPEG) annotated image for quick demos.
+- Serialized responses are memoized on a small, byte-bounded LRU keyed by a BLAKE2b digest of the upload,
+  so re-analyzing the same image skips decode, detection, drawing and encoding.
+- JSON responses are gzip/brotli-compressed (flask-compress) when the client accepts it; compressed
+  /analyze bodies share the result cache, one entry per encoding, so cache hits aren't recompressed.
+- Production: `gunicorn app:app` (see gunicorn.conf.py — multi-process, threaded workers).
 """
-from flask import Flask, request, jsonify
+from flask import Flask, Response, g, request, jsonify
+from flask_compress import Compress
 from flask_cors import CORS
 from PIL import Image
+import msgpack
+import numpy as np
+from streaming_form_data import StreamingFormDataParser
+from streaming_form_data.parser import ParseFailedException
+from streaming_form_data.targets import ValueTarget
+from collections import OrderedDict
+import hashlib
 import io
 import base64
+import os
+import threading
 
 from inspection.vision import Detector
 from inspection.reasoning import Reasoner
-from inspection.utils import pil_image_to_base64, draw_detections
+from inspection.utils import encode_jpeg, jpeg_to_data_url, draw_detections, image_size
 
 APP_VERSION = "0.1.0"
+UPLOAD_CHUNK_SIZE = 64 * 1024
+JSON_MIMETYPE = "application/json"
+MSGPACK_MIMETYPE = "application/msgpack"
+RESULT_CACHE_SIZE = 128
+# Per-worker memory budget for cached bodies; large annotated uploads would
+# otherwise let 128 entries grow to hundreds of MB. Bodies over the per-entry
+# cap are served but not cached.
+RESULT_CACHE_BYTES = 64 * 1024 * 1024
+RESULT_CACHE_MAX_BODY = 8 * 1024 * 1024
+NO_IMAGE_ERROR = "No image provided. Send multipart form with field 'image' or JSON {\"use_sample\": true}."
 
 app = Flask(__name__, static_url_path="/static")
 CORS(app)
@@ -28,6 +55,129 @@ detector = Detector(use_mock=True)
 reasoner = Reasoner()
 
 
+def _load_sample() -> np.ndarray:
+    """Load the sample shipped with the frontend.
+
+    PIL cannot decode SVG, so a PNG rendering of sample_panel.svg (same 1200x800
+    pixel space as the preview) is committed alongside it.
+    """
+    with Image.open(os.path.join(app.static_folder, "images", "sample_panel.png")) as img:
+        return np.asarray(img.convert("RGB"))
+
+
+# Loaded once at startup and kept read-only; the pipeline never mutates its
+# input, so sample requests skip file I/O, decode and copies
+_SAMPLE_ARRAY = _load_sample()
+_SAMPLE_ARRAY.setflags(write=False)
+
+# (image digest, mimetype, annotate) -> serialized response body, plus the
+# flask-compress variants of those bodies keyed by "<encoding>;<key>";
+# least recently used first
+_result_cache = OrderedDict()
+_result_cache_lock = threading.Lock()
+_result_cache_bytes = 0
+_SAMPLE_KEY = b"sample"
+
+
+def _read_multipart_image() -> bytes:
+    """Pull the `image` field out of a multipart body.
+
+    Feeds the raw request stream through streaming-form-data (C parser, no temp
+    files) instead of Werkzeug's `request.files`. Returns b"" if the field is
+    missing or the body can't be parsed (e.g. no boundary), so callers can 400.
+    """
+    target = ValueTarget()
+    try:
+        parser = StreamingFormDataParser(headers={"Content-Type": request.content_type})
+        parser.register("image", target)
+        stream = request.stream
+        while True:
+            chunk = stream.read(UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+            parser.data_received(chunk)
+    except ParseFailedException:
+        return b""
+    return target.value
+
+
+def _cache_get(key):
+    with _result_cache_lock:
+        body = _result_cache.get(key)
+        if body is not None:
+            _result_cache.move_to_end(key)
+        return body
+
+
+def _cache_put(key, body: bytes):
+    global _result_cache_bytes
+    if len(body) > RESULT_CACHE_MAX_BODY:
+        return
+    with _result_cache_lock:
+        old = _result_cache.pop(key, None)
+        if old is not None:
+            _result_cache_bytes -= len(old)
+        _result_cache[key] = body
+        _result_cache_bytes += len(body)
+        while len(_result_cache) > RESULT_CACHE_SIZE or _result_cache_bytes > RESULT_CACHE_BYTES:
+            _, evicted = _result_cache.popitem(last=False)
+            _result_cache_bytes -= len(evicted)
+
+
+class _CompressedBodyCache:
+    """flask-compress cache backend over `_result_cache`.
+
+    Only requests that set `g.result_cache_key` (i.e. /analyze) are cached;
+    everything else is compressed per request as before.
+    """
+
+    def get(self, key):
+        return _cache_get(key) if "result_cache_key" in g else None
+
+    def set(self, key, value):
+        if "result_cache_key" in g:
+            _cache_put(key, value)
+
+
+app.config.update(
+    COMPRESS_CACHE_BACKEND=_CompressedBodyCache,
+    COMPRESS_CACHE_KEY=lambda req: g.get("result_cache_key"),
+)
+Compress(app)
+
+
+def _render_analysis(image: np.ndarray, mimetype: str, annotate: bool = True) -> bytes:
+    """Run the full pipeline on an RGB array and serialize the response body.
+
+    With `annotate=False` the draw + JPEG encode steps are skipped and
+    `annotated_image` is null.
+    """
+    # Run detection (mock or real)
+    detections = detector.detect(image)
+
+    # Run reasoning / SOP mapping
+    analysis = reasoner.analyze(detections, image_size(image))
+
+    # Create an annotated image for the UI (drawn on the BGR buffer the encoder consumes)
+    jpeg = None
+    if annotate:
+        annotated = draw_detections(image, detections, analysis)
+        jpeg = encode_jpeg(annotated)
+
+    if mimetype == MSGPACK_MIMETYPE:
+        return msgpack.packb({
+            "detections": detections,
+            "analysis": analysis,
+            "annotated_image": jpeg,
+        }, use_bin_type=True)
+
+    return app.json.dumps({
+        "detections": detections,
+        "analysis": analysis,
+        "annotated_image": jpeg_to_data_url(jpeg) if jpeg is not None else None,
+    }).encode("utf-8")
+
+
 @app.route("/health", methods=["GET"])
 def health():
     """Health check for orchestration and demos."""
@@ -42,38 +192,51 @@ def analyze():
     Returns structured JSON with:
       - detections: [{label, confidence, bbox: [x,y,w,h]}]
       - analysis: {severity, sop_mappings, recommendations}
-      - annotated_image: base64-encoded PNG (useful for quick demos)
+      - annotated_image: base64-encoded JPEG data URL (useful for quick demos)
+
+    Clients sending `Accept: application/msgpack` get the same structure packed
+    with msgpack, with `annotated_image` as raw JPEG bytes (no base64).
+    Clients that don't render the preview can pass `?annotate=false` to get
+    `annotated_image: null` and skip the draw + encode work entirely.
     """
     try:
-        # Load image from upload or use bundled sample
-        if request.content_type and request.content_type.startswith("multipart/") and "image" in request.files:
-            file = request.files["image"]
-            image = Image.open(file.stream).convert("RGB")
+        # Fingerprint the upload (or bundled sample) and defer decoding until a cache miss
+        if request.content_type and request.content_type.startswith("multipart/"):
+            data = _read_multipart_image()
+            if not data:
+                return jsonify({"error": NO_IMAGE_ERROR}), 400
+            digest = hashlib.blake2b(data, digest_size=16).digest()
+
+            def load_image():
+                return np.asarray(Image.open(io.BytesIO(data)).convert("RGB"))
         else:
             # allow JSON body with use_sample flag for quick demos
             body = request.get_json(silent=True) or {}
             use_sample = body.get("use_sample", False)
-            if use_sample:
-                # load sample image shipped with the frontend
-                image = Image.open("static/images/sample_panel.svg").convert("RGBA").convert("RGB")
-            else:
-                return jsonify({"error": "No image provided. Send multipart form with field 'image' or JSON {\"use_sample\": true}."}), 400
+            if not use_sample:
+                return jsonify({"error": NO_IMAGE_ERROR}), 400
+            digest = _SAMPLE_KEY
 
-        # Run detection (mock or real)
-        detections = detector.detect(image)
+            def load_image():
+                return _SAMPLE_ARRAY
 
-        # Run reasoning / SOP mapping
-        analysis = reasoner.analyze(detections, image.size)
+        if request.accept_mimetypes.best_match([JSON_MIMETYPE, MSGPACK_MIMETYPE]) == MSGPACK_MIMETYPE:
+            mimetype = MSGPACK_MIMETYPE
+        else:
+            mimetype = JSON_MIMETYPE
+        annotate = request.args.get("annotate", "true").lower() != "false"
 
-        # Create an annotated image for the UI (PIL -> base64)
-        annotated = draw_detections(image, detections, analysis)
-        annotated_b64 = pil_image_to_base64(annotated)
+        cache_key = (digest, mimetype, annotate)
+        g.result_cache_key = cache_key
+        payload = _cache_get(cache_key)
+        if payload is None:
+            payload = _render_analysis(load_image(), mimetype, annotate)
+            _cache_put(cache_key, payload)
 
-        return jsonify({
-            "detections": detections,
-            "analysis": analysis,
-            "annotated_image": annotated_b64,
-        })
+        response = Response(payload, mimetype=mimetype)
+        # body is negotiated on Accept; keep JSON and msgpack apart in shared caches
+        response.vary.add("Accept")
+        return response
 
     except Exception as e:
         # Keep errors readable for demo — in production log and return sanitized messages
@@ -81,5 +244,5 @@ def analyze():
 
 
 if __name__ == "__main__":
-    # Development server (use gunicorn or uvicorn for production)
+    # Development server (use `gunicorn app:app` for production, see gunicorn.conf.py)
     app.run(host="0.0.0.0", port=5000, debug=True)
@@ -0,0 +1,20 @@
+"""Gunicorn config for serving the API in production.
+
+    gunicorn app:app
+
+Processes are what scale /analyze across cores: multipart parsing
+(streaming-form-data), detection, reasoning and serialization all hold the GIL.
+Threads only add overlap within a worker while one request waits on socket
+I/O or sits in the GIL-releasing parts (PIL decode, OpenCV color conversion
+and JPEG encode), so keep `threads` small and size `workers` to the cores.
+"""
+import multiprocessing
+import os
+
+bind = os.environ.get("BIND", "0.0.0.0:5000")
+workers = int(os.environ.get("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+worker_class = "gthread"
+threads = int(os.environ.get("THREADS", 4))
+
+# Import the app (and load the sample) once in the master, then fork
+preload_app = True
@@ -6,7 +6,34 @@
 
 Keep this deterministic and easy to extend with a rules engine or LLM later.
 """
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+
+# Severity ranking (index = rank, higher is worse) and fallback SOP metadata for unknown labels
+_SEV_BY_RANK = ("low", "medium", "high")
+_DEFAULT_META = {"iso": "N/A", "sop": "Refer engineering SOP.", "priority": "P3"}
+
+
+# Severity rules: (area_ratio, length_ratio, confidence) -> rank (index into _SEV_BY_RANK)
+def _leak_rank(area_ratio, length_ratio, conf):
+    # leaks are high by default
+    return 2 if conf > 0.7 else 1
+
+
+def _crack_rank(area_ratio, length_ratio, conf):
+    # long cracks -> higher severity
+    if length_ratio > 0.25 or area_ratio > 0.02:
+        return 2
+    return 1 if length_ratio > 0.08 else 0
+
+
+def _corrosion_rank(area_ratio, length_ratio, conf):
+    if area_ratio > 0.06:
+        return 2
+    return 1 if area_ratio > 0.02 else 0
+
+
+# Labels without a rule stay "low"
+_RULES = {"leak": _leak_rank, "crack": _crack_rank, "corrosion": _corrosion_rank}
 
 
 class Reasoner:
@@ -54,26 +81,30 @@ class Reasoner:
         counts = {}
         sop_mappings = []
         recs = []
+        sop_get = self.SOP_DB.get
+        worst_rank = 0
 
         for d in detections:
             lbl = d["label"]
             counts[lbl] = counts.get(lbl, 0) + 1
 
-            # map to SOP/ISO
-            meta = self.SOP_DB.get(lbl, {})
+            # map to SOP/ISO; partial SOP_DB entries fall back per field
+            entry = sop_get(lbl)
+            meta = entry or {}
             sop_mappings.append({
                 "label": lbl,
-                "iso": meta.get("iso", "N/A"),
-                "sop": meta.get("sop", "Refer engineering SOP."),
-                "priority": meta.get("priority", "P3"),
+                "iso": meta.get("iso", _DEFAULT_META["iso"]),
+                "sop": meta.get("sop", _DEFAULT_META["sop"]),
+                "priority": meta.get("priority", _DEFAULT_META["priority"]),
             })
 
-            # severity heuristics (simple rules)
-            sev = self._estimate_severity(d, image_size)
-            recs.extend(self._recommendations_for(lbl, sev, d))
+            # severity heuristics (simple rules); overall = highest among detections
+            rank = self._estimate_severity(d, image_size)
+            if rank > worst_rank:
+                worst_rank = rank
+            recs.extend(self._recommendations_for(lbl, _SEV_BY_RANK[rank], d, entry))
 
-        # overall severity: highest among detections
-        overall = self._aggregate_severity(detections, image_size)
+        overall = _SEV_BY_RANK[worst_rank]
 
         return {
             "summary": {**summary, **counts},
@@ -83,40 +114,22 @@ class Reasoner:
         }
 
     # ----------------- Internal rules -----------------
-    def _estimate_severity(self, detection: Dict, image_size) -> str:
-        lbl = detection["label"]
+    def _estimate_severity(self, detection: Dict, image_size) -> int:
+        """Return the severity rank (index into _SEV_BY_RANK) for one detection."""
+        rule = _RULES.get(detection["label"])
+        if rule is None:
+            return 0
         x, y, w, h = detection["bbox"]
         img_w, img_h = image_size
 
-        # Normalize area ratio
+        # Normalize area / length ratios
         area_ratio = (w * h) / max(1, img_w * img_h)
+        length_ratio = max(w, h) / max(1, max(img_w, img_h))
+        return rule(area_ratio, length_ratio, detection.get("confidence", 0))
 
-        if lbl == "leak":
-            # leaks are high by default
-            if detection.get("confidence", 0) > 0.7:
-                return "high"
-            return "medium"
-
-        if lbl == "crack":
-            # long cracks -> higher severity
-            length_ratio = max(w, h) / max(1, max(img_w, img_h))
-            if length_ratio > 0.25 or area_ratio > 0.02:
-                return "high"
-            if length_ratio > 0.08:
-                return "medium"
-            return "low"
-
-        if lbl == "corrosion":
-            if area_ratio > 0.06:
-                return "high"
-            if area_ratio > 0.02:
-                return "medium"
-            return "low"
-
-        return "low"
-
-    def _recommendations_for(self, label: str, severity: str, detection: Dict) -> List[str]:
-        base = self.SOP_DB.get(label, {})
+    def _recommendations_for(self, label: str, severity: str, detection: Dict, entry: Optional[Dict] = None) -> List[str]:
+        # entry is the raw SOP_DB lookup from analyze; unknown labels render "SOP: None"
+        base = entry or {}
         recs = []
         if severity == "high":
             recs.append(f"{label}: Immediate action — follow SOP: {base.get('sop')}")
@@ -132,12 +145,3 @@ class Reasoner:
             recs.append("Confidence is moderate — capture higher-resolution image for verification.")
 
         return recs
-
-    def _aggregate_severity(self, detections, image_size):
-        order = {"low": 0, "medium": 1, "high": 2}
-        worst = "low"
-        for d in detections:
-            s = self._estimate_severity(d, image_size)
-            if order[s] > order[worst]:
-                worst = s
-        return worst
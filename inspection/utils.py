@@ -1,55 +1,99 @@
 """Utility helpers for image encoding and annotation."""
-from PIL import Image, ImageDraw, ImageFont
-import io
+from PIL import Image
 import base64
-from typing import List, Dict, Any
+import sys
+from functools import lru_cache
+from typing import List, Dict, Any, Tuple, Union
 
+import cv2
+import numpy as np
 
-def pil_image_to_base64(img: Image.Image) -> str:
-    """Convert PIL image to data URL (PNG)."""
-    buffered = io.BytesIO()
-    img.save(buffered, format="PNG")
-    b64 = base64.b64encode(buffered.getvalue()).decode("ascii")
-    return f"data:image/png;base64,{b64}"
+JPEG_QUALITY = 82
 
+# Annotation style, built once at import rather than per request.
+# Colors are BGR: annotation happens on the buffer that goes straight to cv2.imencode.
+_FONT = cv2.FONT_HERSHEY_SIMPLEX
+_FONT_SCALE = 0.5
+_TEXT_COLOR = (255, 255, 255)
+_TEXT_BG = (0, 0, 0)
+
+# Per-label (box color, text color); keys are interned like the detector's labels
+_LABEL_STYLE = {
+    sys.intern(label): (rgb[::-1], _TEXT_COLOR)
+    for label, rgb in (("crack", (255, 165, 0)), ("corrosion", (255, 215, 0)), ("leak", (220, 20, 60)))
+}
+_DEFAULT_STYLE = ((0, 200, 255)[::-1], _TEXT_COLOR)
+
+
+def image_size(img: Union[Image.Image, np.ndarray]) -> Tuple[int, int]:
+    """Return (width, height) for a PIL image or an (H, W, 3) array."""
+    if isinstance(img, np.ndarray):
+        return img.shape[1], img.shape[0]
+    return img.size
 
-def draw_detections(img: Image.Image, detections: List[Dict[str, Any]], analysis: Dict = None) -> Image.Image:
-    """Draw bounding boxes and labels on a copy of the image.
 
-    Returns a new PIL.Image.
+@lru_cache(maxsize=512)
+def _text_size(text: str):
+    """Memoized cv2.getTextSize -> ((w, h), baseline).
+
+    Label texts are "<label> <conf:.2f>", so only a few hundred distinct strings occur.
     """
-    out = img.convert("RGBA").copy()
-    draw = ImageDraw.Draw(out)
+    return cv2.getTextSize(text, _FONT, _FONT_SCALE, 1)
+
 
-    # Try to load a default font; fallback to PIL default
-    try:
-        font = ImageFont.truetype("arial.ttf", size=14)
-    except Exception:
-        font = ImageFont.load_default()
+def encode_jpeg(bgr: np.ndarray) -> memoryview:
+    """Encode a BGR uint8 array (e.g. from draw_detections) to JPEG.
+
+    Encodes with OpenCV (libjpeg-turbo) — much cheaper than PIL's PNG/zlib path
+    and a smaller payload for the UI. Returns a view over OpenCV's output buffer
+    rather than a `bytes` copy; base64 and msgpack both accept it as-is.
+    """
+    ok, buf = cv2.imencode(".jpg", bgr, [int(cv2.IMWRITE_JPEG_QUALITY), JPEG_QUALITY])
+    if not ok:
+        raise ValueError("JPEG encoding failed")
+    return memoryview(buf).cast("B")  # imencode may return (N, 1); flatten the view
 
-    color_map = {"crack": (255, 165, 0, 200), "corrosion": (255, 215, 0, 200), "leak": (220, 20, 60, 200)}
+
+def jpeg_to_data_url(jpeg) -> str:
+    """Wrap JPEG bytes (any bytes-like object) as a base64 data URL."""
+    b64 = base64.b64encode(jpeg).decode("ascii")
+    return f"data:image/jpeg;base64,{b64}"
+
+
+def draw_detections(img: Union[Image.Image, np.ndarray], detections: List[Dict[str, Any]], analysis: Dict = None) -> np.ndarray:
+    """Draw bounding boxes and labels on a copy of the image.
+
+    Accepts a PIL image or an RGB uint8 array. Returns a new BGR uint8 array
+    (OpenCV channel order) meant to be passed straight to encode_jpeg: the
+    RGB->BGR swap is the only full-image copy, and nothing is converted back.
+    """
+    if not isinstance(img, np.ndarray):
+        # app.py already hands us RGB; convert() would cost an extra full-image copy
+        img = np.asarray(img if img.mode == "RGB" else img.convert("RGB"))
+    arr = cv2.cvtColor(img, cv2.COLOR_RGB2BGR)
+    font = _FONT
+    font_scale = _FONT_SCALE
 
     for d in detections:
-        x, y, w, h = d["bbox"]
+        x, y, w, h = map(int, d["bbox"])  # OpenCV needs integer points; model boxes are often floats
         label = d["label"]
         conf = d.get("confidence", 0)
-        col = color_map.get(label, (0, 200, 255, 180))
+        col, text_col = _LABEL_STYLE.get(label, _DEFAULT_STYLE)
 
         # box
-        draw.rectangle([x, y, x + w, y + h], outline=col, width=3)
+        cv2.rectangle(arr, (x, y), (x + w, y + h), col, 3)
         text = f"{label} {conf:.2f}"
-        text_size = draw.textsize(text, font=font)
-        text_bg = (0, 0, 0, 160)
-        draw.rectangle([x, y - text_size[1] - 4, x + text_size[0] + 6, y], fill=text_bg)
-        draw.text((x + 3, y - text_size[1] - 2), text, fill=(255, 255, 255, 255), font=font)
+        (tw, th), baseline = _text_size(text)
+        cv2.rectangle(arr, (x, y - th - baseline - 4), (x + tw + 6, y), _TEXT_BG, -1)
+        cv2.putText(arr, text, (x + 3, y - baseline - 2), font, font_scale, text_col, 1, cv2.LINE_AA)
 
     # Optionally annotate overall severity
     if analysis:
         sev = analysis.get("severity", "N/A")
         summary = analysis.get("summary", {})
-        info = f"Severity: {sev} — {summary.get('total',0)} defect(s)"
-        draw.rectangle([4, 4, 260, 28], fill=(0, 0, 0, 140))
-        draw.text((8, 6), info, fill=(255, 255, 255, 255), font=font)
-
-    return out.convert("RGB")
+        # Hershey fonts are ASCII-only, so no em dash here
+        info = f"Severity: {sev} - {summary.get('total',0)} defect(s)"
+        cv2.rectangle(arr, (4, 4), (260, 28), _TEXT_BG, -1)
+        cv2.putText(arr, info, (8, 21), font, font_scale, _TEXT_COLOR, 1, cv2.LINE_AA)
 
+    return arr
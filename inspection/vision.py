@@ -5,7 +5,12 @@
 """
 from PIL import Image
 import hashlib
-import random
+import sys
+from typing import Union
+
+import numpy as np
+
+from inspection.utils import image_size
 
 
 class Detector:
@@ -13,13 +18,22 @@ class Detector:
 
     Methods:
     - load_model(path): load model weights (stub)
-    - detect(pil_image): return list of detections
+    - detect(image): return list of detections (PIL image or RGB uint8 ndarray)
 
     Detection format (per item):
       {"label": str, "confidence": float, "bbox": [x, y, w, h]}  # bbox in pixels
     """
 
-    SUPPORTED = ["crack", "corrosion", "leak"]
+    # Interned so downstream per-label dict lookups (styles, SOPs) hit the identity fast path
+    SUPPORTED = [sys.intern(label) for label in ("crack", "corrosion", "leak")]
+
+    # Mock bbox size ranges, rows in SUPPORTED order: [[w_lo, w_hi], [h_lo, h_hi]]
+    # as fractions of image width/height (approx per defect type)
+    _MOCK_BBOX_FRACTIONS = np.array([
+        [[0.08, 0.4], [0.01, 0.05]],   # crack: long and thin
+        [[0.05, 0.25], [0.05, 0.25]],  # corrosion
+        [[0.05, 0.18], [0.05, 0.12]],  # leak
+    ])
 
     def __init__(self, model_path: str = None, use_mock: bool = True):
         self.model_path = model_path
@@ -34,52 +48,43 @@ class Detector:
         """
         raise NotImplementedError("Integrate a real model here (YOLO/OpenCV).")
 
-    def detect(self, pil_image: Image.Image):
-        """Detect defects in a PIL image.
+    def detect(self, image: Union[Image.Image, np.ndarray]):
+        """Detect defects in a PIL image or an (H, W, 3) RGB uint8 array.
 
         For demo purposes this returns deterministic mock detections derived from
-        the image bytes (so the same image -> same detections).
+        a small sample of the image pixels (so the same image -> same detections).
         """
         if self.use_mock:
-            return self._mock_detect(pil_image)
+            return self._mock_detect(image)
         # if a model is loaded, call it here and convert outputs to the detection schema
         raise NotImplementedError("Model-backed detection not implemented.")
 
     # --------------------- Mock logic (demo) ---------------------
-    def _mock_detect(self, pil_image: Image.Image):
-        # Deterministic seed from the image content
-        buf = pil_image.tobytes()[:1024]
-        h = hashlib.sha1(buf).hexdigest()
-        seed = int(h[:8], 16)
-        rng = random.Random(seed)
-
-        w, h_img = pil_image.size
-        detections = []
-
-        # Decide how many defects (0..3)
-        n = rng.choices([0, 1, 2, 3], weights=[20, 50, 20, 10])[0]
-        for i in range(n):
-            label = rng.choice(self.SUPPORTED)
-            confidence = round(rng.uniform(0.6, 0.98), 2)
-
-            # bbox size depends on defect type (approx)
-            if label == "crack":
-                bw = int(w * rng.uniform(0.08, 0.4))
-                bh = int(h_img * rng.uniform(0.01, 0.05))
-            elif label == "corrosion":
-                bw = int(w * rng.uniform(0.05, 0.25))
-                bh = int(h_img * rng.uniform(0.05, 0.25))
-            else:  # leak
-                bw = int(w * rng.uniform(0.05, 0.18))
-                bh = int(h_img * rng.uniform(0.05, 0.12))
-
-            x = int(rng.uniform(0, max(1, w - bw)))
-            y = int(rng.uniform(0, max(1, h_img - bh)))
-
-            detections.append({
-                "label": label,
-                "confidence": confidence,
-                "bbox": [x, y, bw, bh],
-            })
-
-        return detections
+    def _mock_detect(self, image: Union[Image.Image, np.ndarray]):
+        w, h_img = image_size(image)
+
+        # Deterministic seed from the top-left 32x32 corner (O(1), not O(pixels));
+        # PIL and ndarray inputs yield the same sample, hashed straight from the buffer
+        if isinstance(image, np.ndarray):
+            buf = np.ascontiguousarray(image[:32, :32])
+        else:
+            buf = np.asarray(image.crop((0, 0, min(32, w), min(32, h_img))))
+        seed = int.from_bytes(hashlib.blake2b(buf, digest_size=8).digest(), "little")
+        rng = np.random.default_rng(seed)
+        dims = np.array([w, h_img])
+
+        # Decide how many defects (0..3), then draw every random value in bulk
+        n = int(rng.choice(4, p=[0.2, 0.5, 0.2, 0.1]))
+        label_idx = rng.integers(0, len(self.SUPPORTED), size=n)
+        confidences = rng.uniform(0.6, 0.98, size=n).round(2)
+
+        ranges = self._MOCK_BBOX_FRACTIONS[label_idx]  # (n, 2, 2)
+        sizes = (dims * rng.uniform(ranges[..., 0], ranges[..., 1])).astype(np.int64)
+        origins = (np.maximum(1, dims - sizes) * rng.uniform(size=(n, 2))).astype(np.int64)
+        bboxes = np.hstack([origins, sizes])
+
+        labels = self.SUPPORTED
+        return [
+            {"label": labels[i], "confidence": conf, "bbox": bbox}
+            for i, conf, bbox in zip(label_idx.tolist(), confidences.tolist(), bboxes.tolist())
+        ]